@@ -15,8 +15,10 @@
 """A key/value cache using Google Cloud Datastore."""
 
 import json
-from typing import Any
+import time
+from typing import Any, Iterable, List
 
+from google.api_core import exceptions
 from google.cloud import datastore
 
 
@@ -33,9 +35,39 @@ class DatastoreCache:
         else:
             return json.loads(e['value'])
 
+    def get_multi(self, names: Iterable[str]) -> List[Any]:
+        """Returns the Python values of the given keys. None if not found."""
+        names = list(names)
+        keys = [self._datastore_client.key('_Cache', name) for name in names]
+        values = {e.key.name: json.loads(e['value'])
+                  for e in self._datastore_client.get_multi(keys)}
+        return [values.get(name) for name in names]
+
     def set(self, name: str, value: Any):
         """Sets a key name to any Python object."""
         key = self._datastore_client.key('_Cache', name)
         e = datastore.Entity(key, exclude_from_indexes=['value'])
-        e.update(value=json.dumps(value))
+        e.update(value=json.dumps(value, separators=(',', ':')))
         self._datastore_client.put(e)
+
+    def add(self, name: str, value: Any, ttl: int) -> bool:
+        """Sets a key name for ttl seconds unless it is already set.
+
+        Returns True if the key was set.
+        """
+        key = self._datastore_client.key('_Cache', name)
+        try:
+            with self._datastore_client.transaction():
+                e = self._datastore_client.get(key)
+                if e is not None and e.get(
+                        'expires', float('inf')) > time.time():
+                    return False
+                e = datastore.Entity(
+                    key, exclude_from_indexes=['value', 'expires'])
+                e.update(value=json.dumps(value, separators=(',', ':')),
+                         expires=time.time() + ttl)
+                self._datastore_client.put(e)
+        except exceptions.Conflict:
+            # Another transaction set the key first.
+            return False
+        return True
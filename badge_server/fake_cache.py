@@ -14,17 +14,41 @@
 
 """An in-memory key/value cache."""
 
-from typing import Any
+import threading
+import time
+from typing import Any, Iterable, List
 
 
 class FakeCache:
     def __init__(self):
         self._cache = {}
+        # Maps the keys stored by add() to the time they expire.
+        self._expires = {}
+        self._lock = threading.Lock()
 
     def get(self, name: str) -> Any:
         """Returns a Python value given a key. None if not found."""
         return self._cache.get(name)
 
+    def get_multi(self, names: Iterable[str]) -> List[Any]:
+        """Returns the Python values of the given keys. None if not found."""
+        return [self._cache.get(name) for name in names]
+
     def set(self, name: str, value: Any):
         """Sets a key name to any Python object."""
-        self._cache[name] = value
+        with self._lock:
+            self._cache[name] = value
+            self._expires.pop(name, None)
+
+    def add(self, name: str, value: Any, ttl: int) -> bool:
+        """Sets a key name for ttl seconds unless it is already set.
+
+        Returns True if the key was set.
+        """
+        with self._lock:
+            if name in self._cache and self._expires.get(
+                    name, float('inf')) > time.time():
+                return False
+            self._cache[name] = value
+            self._expires[name] = time.time() + ttl
+            return True
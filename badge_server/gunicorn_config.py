@@ -0,0 +1,53 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Gunicorn configuration for serving the badge server in production.
+
+Example usage:
+    $ gunicorn -c gunicorn_config.py main:app
+"""
+
+import multiprocessing
+import os
+
+bind = ':{}'.format(os.environ.get('PORT', 8080))
+
+# Badge requests spend their time waiting on the cache and the compatibility
+# store rather than on the CPU, so each worker serves many requests
+# concurrently using threads. The number of workers is configured rather than
+# derived from multiprocessing.cpu_count() since App Engine reports the CPUs
+# of the host rather than those of the instance.
+worker_class = 'gthread'
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+threads = 16
+
+# Keep connections from the load balancer open between requests.
+keepalive = 30
+
+# The application is imported once in the master process and the workers are
+# forked from it, so they share the imported modules' memory instead of each
+# importing them again. Nothing connects to the cache, the compatibility store
+# or GitHub at import time, and the background cache refresher runs in its own
+# process forked from the master (see when_ready), so no connection or thread
+# is shared across the fork.
+preload_app = True
+
+
+def when_ready(server):
+    # The workers share the refreshed results through the cache, so a single
+    # refresher per instance is started rather than one per worker. It runs
+    # in its own process so that it keeps running when a worker is restarted.
+    import main
+    multiprocessing.Process(
+        target=main.run_cache_refresher, daemon=True).start()
@@ -19,7 +19,9 @@ Requires Python 3.6 or later.
 Example usage (defaults to using host='0.0.0.0', port=8080):
     $ python3 main.py
 
-For production usage, this module exports a WSGI application called  `app`
+For production usage, this module exports a WSGI application called  `app`,
+which is served by gunicorn:
+    $ gunicorn -c gunicorn_config.py main:app
 
 Supported routes:
     /one_badge_image?package=<package_name>&badge=<badge_name>
@@ -35,10 +37,19 @@ Example Usage:
     http://0.0.0.0:8080/one_badge_target?package=tensorflow
 """
 
+import concurrent.futures
+import datetime
 import enum
 import flask
+import functools
+import hashlib
+import itertools
 import logging
+import os
 import pybadges
+import random
+import threading
+import time
 
 import utils as badge_utils
 from compatibility_lib import utils as compat_utils
@@ -47,10 +58,71 @@ from compatibility_lib import dependency_highlighter as highlighter
 from compatibility_lib import compatibility_store
 from compatibility_lib import configs
 from compatibility_lib import package
-from typing import FrozenSet, Iterable, List, Optional
+from typing import FrozenSet, Iterable, List, Optional, Tuple
 
 app = flask.Flask(__name__)
 
+# The self compatibility, pair compatibility and dependency checks for a
+# package are independent and spend most of their time waiting on the
+# compatibility store, so they are run concurrently. The pool is shared by all
+# requests to bound the number of threads.
+_CHECK_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=30)
+
+# The outdated and deprecated dependency lookups of the dependency check are
+# also independent. The deprecated dependency lookup runs on its own pool since
+# waiting on _CHECK_EXECUTOR from one of its own tasks could deadlock.
+_DEPRECATED_DEP_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=10)
+
+# Computed results are written to badge_utils.cache in the background so that
+# the request that computed them doesn't wait on the cache round trip.
+_CACHE_WRITE_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+
+# Checks that take longer than CHECK_TIMEOUT are reported as internal errors
+# rather than holding up the request (or the cache refresher) indefinitely. A
+# timed out check keeps running in the pool but its result is discarded.
+CHECK_TIMEOUT = datetime.timedelta(seconds=30)
+
+# Check results are served from badge_utils.cache. Cached results older than
+# CACHE_MAX_AGE are recomputed when requested, but a background thread
+# recomputes the results of every whitelisted package every
+# CACHE_REFRESH_INTERVAL so that requests are normally answered from the cache
+# without querying the compatibility store.
+CACHE_MAX_AGE = datetime.timedelta(minutes=10)
+CACHE_REFRESH_INTERVAL = datetime.timedelta(minutes=5)
+
+# Results read from or written to badge_utils.cache are also kept in memory
+# for LOCAL_CACHE_MAX_AGE so that repeated requests for the same badge don't
+# each need a cache round trip. Maps package names to a 3 tuple of the
+# results, the time they were computed and the time they were stored locally.
+LOCAL_CACHE_MAX_AGE = datetime.timedelta(seconds=30)
+_local_check_results = {}
+
+# Results of checks that failed with an internal error are only cached for a
+# short time, which spares a failing compatibility store from being queried on
+# every request without keeping the error for long once it recovers.
+ERROR_CACHE_MAX_AGE = datetime.timedelta(minutes=1)
+
+# Included in every cache key. Bump it whenever the format of the cached
+# values changes so that a deployment never reads values written by an older
+# version of the server.
+CACHE_KEY_VERSION = 3
+
+# The URL of the server that badges link their target pages under (e.g.
+# "https://python-compatibility-tools.appspot.com"). If it isn't configured
+# the links are built from the request's Host header, which the client
+# chooses, so badge images are only memoized when it is.
+BADGE_SERVER_URL = os.environ.get('BADGE_SERVER_URL')
+
+_cache_refresher_lock = threading.Lock()
+_cache_refresher_started = False
+
+# The futures of the check results that are being computed, by package name.
+# Concurrent requests for the same package wait on the same future instead of
+# each querying the compatibility store.
+_pending_check_results = {}
+_pending_check_results_lock = threading.Lock()
+
 
 @enum.unique
 class BadgeStatus(str, enum.Enum):
@@ -158,13 +230,13 @@ def _get_missing_details(package_names: List[str],
         "Missing data for packages=['opencensus'], versions=[2]".
     """
     package_names.sort()
-    message = 'package_names: Expected length of 1 or 2, got {}'.format(
-        len(package_names))
-    assert len(package_names) in (1, 2), message
-
-    message = 'One of the packages in {} is not whitelisted'.format(
-        str(package_names))
-    assert compat_utils._is_package_in_whitelist(package_names), message
+    # The messages are only formatted if an assertion fails since this is
+    # called for every pair of packages.
+    assert len(package_names) in (1, 2), (
+        'package_names: Expected length of 1 or 2, got {}'.format(
+            len(package_names)))
+    assert compat_utils._is_package_in_whitelist(package_names), (
+        'One of the packages in {} is not whitelisted'.format(package_names))
 
     all_versions = (2, 3)
     versions_supported = set(all_versions)
@@ -304,13 +376,24 @@ def _get_pair_compatibility_dict(package_name: str) -> dict:
     pair_mapping = badge_utils.store.get_pairwise_compatibility_for_package(
         package_name)
 
-    package_to_self_compatibility = badge_utils.store.get_self_compatibilities(
-        [_get_other_package_from_set(package_name, pair)
-         for pair in pair_mapping])
+    # The self compatibility of the other package is only consulted for pairs
+    # with a non SUCCESS result, so it is not fetched at all in the common case
+    # where every pair is compatible.
+    incompatible_packages = [
+        _get_other_package_from_set(package_name, pair)
+        for pair, compatibility_results in pair_mapping.items()
+        if any(res.status != compatibility_store.Status.SUCCESS
+               for res in compatibility_results)]
+    package_to_self_compatibility = {}
+    if incompatible_packages:
+        package_to_self_compatibility = (
+            badge_utils.store.get_self_compatibilities(incompatible_packages))
 
     for pair, compatibility_results in pair_mapping.items():
         other_package = _get_other_package_from_set(package_name, pair)
         other_package_name = other_package.install_name
+        # Computed at most once per pair, when a result needs it.
+        other_self_compat_res = None
 
         missing_details = _get_missing_details(
             [pkg.install_name for pkg in pair], compatibility_results)
@@ -327,25 +410,26 @@ def _get_pair_compatibility_dict(package_name: str) -> dict:
             if result_dict[pyver]['details'] is default_details:
                 result_dict[pyver]['details'] = {}
 
+            # The logic after this point only handles non SUCCESS statuses.
+            if res.status == compatibility_store.Status.SUCCESS:
+                continue
+
             # Not all packages are supported in both Python 2 and Python 3. If
             # either package is not supported in the Python version being
             # checked then skip the check.
             unsupported_packages = unsupported_package_mapping.get(version)
-            if any([pkg.install_name in unsupported_packages for pkg in pair]):
-                continue
-
-            # The logic after this point only handles non SUCCESS statuses.
-            if res.status == compatibility_store.Status.SUCCESS:
+            if any(pkg.install_name in unsupported_packages for pkg in pair):
                 continue
 
             # If `other_package` is not self compatible (meaning that it has a
             # conflict within it's own dependencies) then skip the check since
             # a pairwise comparison is only significant if both packages are
             # self_compatible.
-            self_compat_res = _self_compatibilities_to_dict(
-                other_package_name,
-                package_to_self_compatibility.get(other_package, []))
-            if self_compat_res[pyver]['status'] != BadgeStatus.SUCCESS:
+            if other_self_compat_res is None:
+                other_self_compat_res = _self_compatibilities_to_dict(
+                    other_package_name,
+                    package_to_self_compatibility.get(other_package, []))
+            if other_self_compat_res[pyver]['status'] != BadgeStatus.SUCCESS:
                 continue
 
             details = res.details or badge_utils.EMPTY_DETAILS
@@ -384,8 +468,13 @@ def _get_dependency_dict(package_name: str) -> dict:
     result_dict = badge_utils._build_default_result(
         status=BadgeStatus.SUCCESS, include_pyversion=False, details={})
 
+    deprecated_deps_future = _DEPRECATED_DEP_EXECUTOR.submit(
+        badge_utils.finder.get_deprecated_dep, package_name)
     outdated_deps = badge_utils.highlighter.check_package(package_name)
-    _deps_list = badge_utils.finder.get_deprecated_dep(package_name)[1]
+    # Bounded so that a hung lookup doesn't also hold on to the
+    # _CHECK_EXECUTOR thread running this check.
+    _deps_list = deprecated_deps_future.result(
+        timeout=CHECK_TIMEOUT.total_seconds())[1]
     deprecated_deps = ', '.join(_deps_list)
 
     outdated_depencdency_name_to_details = {}
@@ -464,9 +553,18 @@ def _get_check_results(package_name: str, commit_number: str = None):
         return (self_compat_res, google_compat_res, dependency_res)
 
     try:
-        self_compat_res = _get_self_compatibility_dict(package_name)
-        google_compat_res = _get_pair_compatibility_dict(package_name)
-        dependency_res = _get_dependency_dict(package_name)
+        self_compat_future = _CHECK_EXECUTOR.submit(
+            _get_self_compatibility_dict, package_name)
+        google_compat_future = _CHECK_EXECUTOR.submit(
+            _get_pair_compatibility_dict, package_name)
+        dependency_future = _CHECK_EXECUTOR.submit(
+            _get_dependency_dict, package_name)
+        concurrent.futures.wait(
+            [self_compat_future, google_compat_future, dependency_future],
+            timeout=CHECK_TIMEOUT.total_seconds())
+        self_compat_res = self_compat_future.result(timeout=0)
+        google_compat_res = google_compat_future.result(timeout=0)
+        dependency_res = dependency_future.result(timeout=0)
     except Exception:
         logging.exception(
             'Exception checking results for "{}"'.format(package_name))
@@ -480,13 +578,247 @@ def _get_check_results(package_name: str, commit_number: str = None):
     return (self_compat_res, google_compat_res, dependency_res)
 
 
+def _get_cache_key(package_name: str) -> str:
+    return 'v{}:{}_check_results'.format(CACHE_KEY_VERSION, package_name)
+
+
+def _restore_badge_statuses(result: dict):
+    """Restores the BadgeStatus values of a result read from the cache.
+
+    Caches that serialize values as JSON return the statuses as plain strings.
+    """
+    if 'status' in result:
+        result['status'] = BadgeStatus(result['status'])
+    for pyver in ['py2', 'py3']:
+        if pyver in result:
+            _restore_badge_statuses(result[pyver])
+
+
+def _cache_check_results(package_name: str, results: tuple):
+    """Stores the results returned by _get_check_results() in the cache.
+
+    The results are stored in memory immediately and written to
+    badge_utils.cache on _CACHE_WRITE_EXECUTOR.
+    """
+    now = datetime.datetime.now()
+    _local_check_results[package_name] = (results, now, now)
+    _CACHE_WRITE_EXECUTOR.submit(
+        _write_cached_check_results, package_name, results, now)
+
+
+def _write_cached_check_results(package_name: str, results: tuple,
+                                timestamp: datetime.datetime):
+    """Writes check results computed at timestamp to badge_utils.cache.
+
+    Failures are logged rather than raised since the results can always be
+    recomputed.
+    """
+    try:
+        # The timestamp is stored as seconds since the epoch rather than a
+        # formatted string since it is only ever compared, never displayed.
+        badge_utils.cache.set(
+            _get_cache_key(package_name),
+            {'timestamp': timestamp.timestamp(), 'results': list(results)})
+    except Exception:
+        logging.exception(
+            'Exception caching results for "{}"'.format(package_name))
+
+
+def _read_cached_check_results(package_name: str):
+    """Reads the check results of a package from the cache.
+
+    Returns:
+        A 2 tuple of the results (the same 3 tuple as _get_check_results())
+        and their age, or None if the results are not cached.
+    """
+    now = datetime.datetime.now()
+    local = _local_check_results.get(package_name)
+    if local is not None and now - local[2] < LOCAL_CACHE_MAX_AGE:
+        results, timestamp, _ = local
+        return results, now - timestamp
+
+    try:
+        cached = badge_utils.cache.get(_get_cache_key(package_name))
+    except Exception:
+        logging.exception(
+            'Exception reading cached results for "{}"'.format(package_name))
+        cached = None
+    decoded = _decode_cached_check_results(cached)
+    # The cache may be unavailable or missing results whose write failed, in
+    # which case the results kept in memory are used for as long as they are
+    # newer than the cached ones.
+    if local is not None and (decoded is None or local[1] > decoded[1]):
+        decoded = local[:2]
+    if decoded is None:
+        return None
+
+    results, timestamp = decoded
+    _local_check_results[package_name] = (results, timestamp, now)
+    return results, now - timestamp
+
+
+def _decode_cached_check_results(cached):
+    """Decodes a cache value written by _cache_check_results().
+
+    Returns:
+        A 2 tuple of the results (the same 3 tuple as _get_check_results())
+        and the time they were computed, or None if cached is None.
+    """
+    if cached is None:
+        return None
+
+    timestamp = datetime.datetime.fromtimestamp(cached['timestamp'])
+    results = tuple(cached['results'])
+    for result in results:
+        _restore_badge_statuses(result)
+    return results, timestamp
+
+
+def _get_cached_check_results(package_name: str):
+    """Gets the check results from the cache, computing them if needed.
+
+    Returns the same 3 tuple as _get_check_results().
+    """
+    # Results for packages that are not whitelisted are computed without
+    # querying the compatibility store, so they are not worth caching.
+    if not compat_utils._is_package_in_whitelist([package_name]):
+        return _get_check_results(package_name)
+
+    cached = _read_cached_check_results(package_name)
+    if cached is not None:
+        results, age = cached
+        max_age = CACHE_MAX_AGE
+        if _get_badge_status(*results) == BadgeStatus.INTERNAL_ERROR:
+            max_age = ERROR_CACHE_MAX_AGE
+        if age < max_age:
+            return results
+
+    return _compute_check_results(package_name)
+
+
+def _compute_check_results(package_name: str):
+    """Computes and caches the check results of a package.
+
+    Only one computation per package runs at a time; concurrent callers wait
+    for it and share its results.
+    """
+    with _pending_check_results_lock:
+        future = _pending_check_results.get(package_name)
+        if future is not None:
+            computing = False
+        else:
+            computing = True
+            future = concurrent.futures.Future()
+            _pending_check_results[package_name] = future
+
+    if not computing:
+        return future.result()
+
+    try:
+        results = _get_check_results(package_name)
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    else:
+        # Waiting callers are answered before the results are written to the
+        # cache.
+        future.set_result(results)
+        _cache_check_results(package_name, results)
+    finally:
+        with _pending_check_results_lock:
+            del _pending_check_results[package_name]
+    return results
+
+
+def _get_refresh_claim_key(package_name: str) -> str:
+    return 'v{}:{}_refresh_claim'.format(CACHE_KEY_VERSION, package_name)
+
+
+def _claim_refresh(package_name: str) -> bool:
+    """Claims the refresh of a package's results for CACHE_REFRESH_INTERVAL.
+
+    Returns False if another server process claimed it first. The refresh is
+    claimed anyway if the cache is unavailable, since the results couldn't be
+    shared between processes then.
+    """
+    try:
+        return badge_utils.cache.add(
+            _get_refresh_claim_key(package_name), True,
+            int(CACHE_REFRESH_INTERVAL.total_seconds()))
+    except Exception:
+        logging.exception(
+            'Exception claiming the refresh of "{}"'.format(package_name))
+        return True
+
+
+def _refresh_cached_check_results():
+    """Recomputes and caches the results of every whitelisted package."""
+    package_names = list(itertools.chain(configs.PKG_LIST,
+                                         configs.WHITELIST_URLS))
+    # Every server process runs a refresher and they share the cache, so each
+    # package is only refreshed by the process that claims it. The packages
+    # are shuffled so that processes started together don't all wait on the
+    # same package. Every cached result is first read in a single round trip
+    # to skip the packages that another process refreshed recently.
+    random.shuffle(package_names)
+    try:
+        cached_values = badge_utils.cache.get_multi(
+            [_get_cache_key(package_name) for package_name in package_names])
+    except Exception:
+        logging.exception('Exception reading cached results')
+        cached_values = [None] * len(package_names)
+
+    for package_name, cached_value in zip(package_names, cached_values):
+        decoded = _decode_cached_check_results(cached_value)
+        if (decoded is not None and
+                datetime.datetime.now() - decoded[1] < CACHE_REFRESH_INTERVAL):
+            continue
+        # A pass can take minutes, so the results are read again in case
+        # another process refreshed them since the pass started.
+        cached = _read_cached_check_results(package_name)
+        if cached is not None and cached[1] < CACHE_REFRESH_INTERVAL:
+            continue
+        if not _claim_refresh(package_name):
+            continue
+        _compute_check_results(package_name)
+
+
+def run_cache_refresher():
+    """Refreshes the cached check results every CACHE_REFRESH_INTERVAL.
+
+    Never returns.
+    """
+    while True:
+        try:
+            _refresh_cached_check_results()
+        except Exception:
+            logging.exception('Exception refreshing the cached check results')
+        time.sleep(CACHE_REFRESH_INTERVAL.total_seconds())
+
+
+def start_cache_refresher():
+    """Starts refreshing the cached check results in the background.
+
+    The first refresh computes the results of every whitelisted package that
+    aren't already cached, so calling this when the server starts means that
+    even the first requests are answered from the cache. Only one refresher
+    is started per process.
+    """
+    global _cache_refresher_started
+    with _cache_refresher_lock:
+        if _cache_refresher_started:
+            return
+        _cache_refresher_started = True
+    threading.Thread(target=run_cache_refresher, daemon=True).start()
+
+
 @app.route('/')
 def greetings():
     """This allows for testing server health using minimal resources"""
     return 'Hello World!'
 
 
-def _format_badge_name(package_name, badge_name, commit_number):
+def _format_badge_name(package_name, badge_name):
     """Formats the badge name (assumes package_name is whitelisted)."""
     if badge_name:
         return badge_name
@@ -497,19 +829,48 @@ def _format_badge_name(package_name, badge_name, commit_number):
         return 'compatibility check (PyPI)'
 
 
+def _render_badge(left_text: str, right_text: str, right_color: str,
+                  whole_link: str) -> Tuple[bytes, str]:
+    """Renders a badge image.
+
+    Returns:
+        A 2 tuple of the UTF-8 encoded SVG of the badge and its ETag. The SVG
+        is encoded here so that memoized badges are only encoded once.
+    """
+    badge = pybadges.badge(
+        left_text=left_text,
+        right_text=right_text,
+        right_color=right_color,
+        whole_link=whole_link).encode('utf-8')
+    return badge, hashlib.sha1(badge).hexdigest()
+
+
+# Reuses the SVG and ETag of identical badges.
+_render_cached_badge = functools.lru_cache(maxsize=1024)(_render_badge)
+
+
 @app.route('/one_badge_image')
 def one_badge_image():
     """Generate a badge that captures all checks."""
     package_name = flask.request.args.get('package')
-    badge_name = flask.request.args.get('badge')
-
-    commit_number = badge_utils._calculate_commit_number(package_name)
-    self, google, dependency = _get_check_results(package_name)
+    # An empty badge name is displayed as the default one.
+    badge_name = flask.request.args.get('badge') or None
+    if not package_name:
+        return flask.make_response(
+            "Request must specify 'package' parameter", 400)
+
+    # The commit number is only displayed on the badge target page, so the
+    # GitHub API is not queried when rendering the (much more frequently
+    # requested) badge image.
+    self, google, dependency = _get_cached_check_results(package_name)
     status = _get_badge_status(self, google, dependency)
     color = BADGE_STATUS_TO_COLOR[status]
-    badge_name = _format_badge_name(package_name, badge_name, commit_number)
+    # Only badges whose text and link are chosen by the server are memoized.
+    memoize = (BADGE_SERVER_URL is not None and badge_name is None and
+               compat_utils._is_package_in_whitelist([package_name]))
+    badge_name = _format_badge_name(package_name, badge_name)
     details_link = '{}{}'.format(
-        flask.request.url_root[:-1],
+        (BADGE_SERVER_URL or flask.request.url_root).rstrip('/'),
         flask.url_for('one_badge_target', package=package_name))
 
     badge_args = dict(
@@ -520,17 +881,29 @@ def one_badge_image():
 
     if flask.current_app.config['TESTING']:
         response = flask.json.jsonify(**badge_args)
+        response.add_etag()
     else:
-        badge = pybadges.badge(**badge_args)
+        # Badges are only memoized when every part of the memo key is bounded:
+        # the package is whitelisted, the badge name is the default one, the
+        # details link is under BADGE_SERVER_URL and the status is a
+        # BadgeStatus. Otherwise each arbitrary package, `badge` argument or
+        # Host header would evict a memoized badge.
+        if memoize:
+            badge, etag = _render_cached_badge(**badge_args)
+        else:
+            badge, etag = _render_badge(**badge_args)
         response = flask.make_response(badge)
         response.content_type = badge_utils.SVG_CONTENT_TYPE
+        response.set_etag(etag)
 
     # https://tools.ietf.org/html/rfc2616#section-13.4 allows success responses
     # to be cached if no `Cache-Control` header is set. Since the content of
     # the image is frequently updated, caching is explicitly disabled to force
-    # the client/cache to refetch the content on every request.
+    # the client/cache to revalidate the content on every request. The ETag
+    # allows revalidation of an unchanged badge to be answered with a
+    # bodyless "304 Not Modified".
     response.headers['Cache-Control'] = 'no-cache'
-    return response
+    return response.make_conditional(flask.request)
 
 
 @app.route('/all')
@@ -562,9 +935,17 @@ def all_badges():
 @app.route('/one_badge_target')
 def one_badge_target():
     package_name = flask.request.args.get('package')
-    commit_number = badge_utils._calculate_commit_number(package_name)
+    if not package_name:
+        return flask.make_response(
+            "Request must specify 'package' parameter", 400)
+
+    # Only whitelisted packages are checked, so GitHub is not queried for the
+    # commit number of arbitrary URLs.
+    commit_number = None
+    if compat_utils._is_package_in_whitelist([package_name]):
+        commit_number = badge_utils._calculate_commit_number(package_name)
 
-    self, google, dependency = _get_check_results(package_name)
+    self, google, dependency = _get_cached_check_results(package_name)
     template_args = dict(
         package_name=package_name,
         self_compat_res=self,
@@ -581,4 +962,5 @@ def one_badge_target():
 
 
 if __name__ == '__main__':
+    start_cache_refresher()
     app.run(host='0.0.0.0', port=8080)
@@ -16,22 +16,55 @@
 
 import os
 import json
-from typing import Any
+import zlib
+from typing import Any, Iterable, List
 
 import redis
 
+# The cache is only an optimization, so a slow or unreachable Redis server
+# should fail quickly rather than stall the request that is using it.
+SOCKET_CONNECT_TIMEOUT = 0.1
+SOCKET_TIMEOUT = 0.2
+
 
 class RedisCache:
     def __init__(self):
         redis_host = os.environ.get('REDISHOST', '10.0.0.3')
         redis_port = int(os.environ.get('REDISPORT', 6379))
         self._redis_client = redis.StrictRedis(
-            host=redis_host, port=redis_port)
+            host=redis_host,
+            port=redis_port,
+            socket_connect_timeout=SOCKET_CONNECT_TIMEOUT,
+            socket_timeout=SOCKET_TIMEOUT)
 
     def get(self, name: str) -> Any:
         """Returns a Python value given a key. None if not found."""
-        return json.loads(self._redis_client.get(name))
+        value = self._redis_client.get(name)
+        if value is None:
+            return None
+        return json.loads(zlib.decompress(value))
+
+    def get_multi(self, names: Iterable[str]) -> List[Any]:
+        """Returns the Python values of the given keys. None if not found."""
+        values = self._redis_client.mget(names)
+        return [None if value is None else json.loads(zlib.decompress(value))
+                for value in values]
 
     def set(self, name: str, value: Any):
         """Sets a key name to any Python object."""
-        return self._redis_client.set(name, json.loads(value))
+        return self._redis_client.set(name, _encode(value))
+
+    def add(self, name: str, value: Any, ttl: int) -> bool:
+        """Sets a key name for ttl seconds unless it is already set.
+
+        Returns True if the key was set.
+        """
+        return bool(self._redis_client.set(
+            name, _encode(value), nx=True, ex=ttl))
+
+
+def _encode(value: Any) -> bytes:
+    # Values are compressed since repeated keys and details compress well and
+    # every value is sent over the network.
+    return zlib.compress(
+        json.dumps(value, separators=(',', ':')).encode('utf-8'))
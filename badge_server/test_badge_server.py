@@ -12,8 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import concurrent.futures
+import datetime
 import mock
 import os
+import threading
 import unittest
 
 from compatibility_lib import fake_compatibility_store
@@ -21,6 +24,7 @@ from compatibility_lib import fake_compatibility_store
 os.environ["RUN_LOCALLY"] = 'true'
 
 # Set the cache to use local cache before importing the main module
+import fake_cache
 import main
 
 
@@ -318,6 +322,38 @@ class TestBadgeServer(unittest.TestCase):
 
         self.assertEqual(result_dict, expected)
 
+    def test__get_pair_compatibility_dict_success_skips_self_lookup(self):
+        from compatibility_lib import compatibility_store
+        from compatibility_lib import package
+
+        expected = {
+            'py2': {'status': main.BadgeStatus.SUCCESS, 'details': {}},
+            'py3': {'status': main.BadgeStatus.SUCCESS, 'details': {}},
+        }
+
+        PACKAGE_1 = package.Package("opencensus")
+        PACKAGE_2 = package.Package("tensorflow")
+        self.fake_store._packages_to_compatibility_result[
+            frozenset([PACKAGE_1, PACKAGE_2])] = [
+                compatibility_store.CompatibilityResult(
+                    packages=[PACKAGE_1, PACKAGE_2],
+                    python_major_version=version,
+                    status=compatibility_store.Status.SUCCESS)
+                for version in (2, 3)]
+
+        pkgs = [p.install_name for p in (PACKAGE_1, PACKAGE_2)]
+        patch_configs = mock.patch('main.configs.PKG_LIST', pkgs)
+        patch_self_compatibilities = mock.patch.object(
+            self.fake_store, 'get_self_compatibilities')
+
+        with self.patch_store, patch_configs, \
+                patch_self_compatibilities as mock_self_compatibilities:
+            result_dict = main._get_pair_compatibility_dict(
+                PACKAGE_1.install_name)
+
+        self.assertEqual(result_dict, expected)
+        mock_self_compatibilities.assert_not_called()
+
     def test__get_check_results_success(self):
         expected_self_res = {
             'py2': { 'status': main.BadgeStatus.SUCCESS, 'details': {} },
@@ -429,3 +465,224 @@ class TestBadgeServer(unittest.TestCase):
         self.assertEqual(google_res, expected_google_res)
         self.assertEqual(dep_res, expected_dep_res)
         self.assertEqual(status, main.BadgeStatus.INTERNAL_ERROR)
+
+    def test__get_check_results_timeout(self):
+        check_finished = threading.Event()
+        self.addCleanup(check_finished.set)
+
+        def slow_self_res(package_name):
+            check_finished.wait()
+            return {}
+
+        mock_google_res = mock.Mock(return_value={})
+        mock_dep_res = mock.Mock(return_value={})
+
+        patch_self_res = mock.patch(
+            'main._get_self_compatibility_dict', slow_self_res)
+        patch_google_res = mock.patch(
+            'main._get_pair_compatibility_dict', mock_google_res)
+        patch_dep_res = mock.patch(
+            'main._get_dependency_dict', mock_dep_res)
+        patch_timeout = mock.patch(
+            'main.CHECK_TIMEOUT', datetime.timedelta(0))
+
+        with patch_self_res, patch_google_res, patch_dep_res, patch_timeout:
+            self_res, google_res, dep_res = main._get_check_results('opencensus')
+            status = main._get_badge_status(self_res, google_res, dep_res)
+
+        self.assertEqual(status, main.BadgeStatus.INTERNAL_ERROR)
+
+    def test__get_dependency_dict_deprecated_deps_timeout(self):
+        lookup_finished = threading.Event()
+        self.addCleanup(lookup_finished.set)
+
+        def slow_get_deprecated_dep(package_name):
+            lookup_finished.wait()
+            return package_name, []
+
+        mock_highlighter = mock.Mock()
+        mock_highlighter.check_package.return_value = []
+        mock_finder = mock.Mock()
+        mock_finder.get_deprecated_dep.side_effect = slow_get_deprecated_dep
+
+        patch_highlighter = mock.patch(
+            'main.badge_utils.highlighter', mock_highlighter)
+        patch_finder = mock.patch('main.badge_utils.finder', mock_finder)
+        patch_timeout = mock.patch(
+            'main.CHECK_TIMEOUT', datetime.timedelta(0))
+
+        with patch_highlighter, patch_finder, patch_timeout:
+            with self.assertRaises(concurrent.futures.TimeoutError):
+                main._get_dependency_dict('opencensus')
+
+    def test__render_cached_badge_reuses_identical_badges(self):
+        main._render_cached_badge.cache_clear()
+        mock_badge = mock.Mock(return_value='<svg></svg>')
+        badge_args = dict(
+            left_text='compatibility check (PyPI)',
+            right_text='success',
+            right_color='#44CC44',
+            whole_link='http://localhost/one_badge_target?package=opencensus')
+        expected_etag = '9ed5d9c55c348ab8df6e84baeabeb87e729730ba'
+
+        with mock.patch('main.pybadges.badge', mock_badge):
+            badge, etag = main._render_cached_badge(**badge_args)
+            self.assertEqual(
+                main._render_cached_badge(**badge_args), (badge, etag))
+            main._render_cached_badge(
+                **dict(badge_args, right_text='internal error'))
+
+        self.assertEqual(badge, b'<svg></svg>')
+        self.assertEqual(etag, expected_etag)
+        self.assertEqual(mock_badge.call_count, 2)
+        main._render_cached_badge.cache_clear()
+
+    def test_one_badge_image_memoizes_only_default_badge_names(self):
+        success_res = {'status': main.BadgeStatus.SUCCESS, 'details': {}}
+        check_results = (
+            {'py2': success_res, 'py3': success_res},
+            {'py2': success_res, 'py3': success_res},
+            success_res)
+        mock_render_cached_badge = mock.Mock(return_value=(b'<svg/>', 'a'))
+        mock_render_badge = mock.Mock(return_value=(b'<svg/>', 'b'))
+
+        patch_testing = mock.patch.dict(main.app.config, {'TESTING': False})
+        patch_url = mock.patch(
+            'main.BADGE_SERVER_URL', 'https://badges.example.com/')
+        patch_results = mock.patch(
+            'main._get_cached_check_results', return_value=check_results)
+        patch_cached_badge = mock.patch(
+            'main._render_cached_badge', mock_render_cached_badge)
+        patch_badge = mock.patch('main._render_badge', mock_render_badge)
+
+        with patch_testing, patch_url, patch_results, patch_cached_badge, \
+                patch_badge:
+            client = main.app.test_client()
+            client.get('/one_badge_image?package=google-api-core',
+                       headers={'Host': 'attacker.example.com'})
+            client.get('/one_badge_image?package=google-api-core&badge=')
+            client.get(
+                '/one_badge_image?package=google-api-core&badge=custom')
+
+        self.assertEqual(mock_render_cached_badge.call_count, 2)
+        for args, kwargs in mock_render_cached_badge.call_args_list:
+            self.assertEqual(kwargs['left_text'], 'compatibility check (PyPI)')
+            self.assertEqual(
+                kwargs['whole_link'],
+                'https://badges.example.com/one_badge_target'
+                '?package=google-api-core')
+        mock_render_badge.assert_called_once()
+        self.assertEqual(
+            mock_render_badge.call_args[1]['left_text'], 'custom')
+
+    def test_one_badge_image_not_memoized_without_server_url(self):
+        success_res = {'status': main.BadgeStatus.SUCCESS, 'details': {}}
+        check_results = (
+            {'py2': success_res, 'py3': success_res},
+            {'py2': success_res, 'py3': success_res},
+            success_res)
+        mock_render_cached_badge = mock.Mock(return_value=(b'<svg/>', 'a'))
+        mock_render_badge = mock.Mock(return_value=(b'<svg/>', 'b'))
+
+        patch_testing = mock.patch.dict(main.app.config, {'TESTING': False})
+        patch_url = mock.patch('main.BADGE_SERVER_URL', None)
+        patch_results = mock.patch(
+            'main._get_cached_check_results', return_value=check_results)
+        patch_cached_badge = mock.patch(
+            'main._render_cached_badge', mock_render_cached_badge)
+        patch_badge = mock.patch('main._render_badge', mock_render_badge)
+
+        with patch_testing, patch_url, patch_results, patch_cached_badge, \
+                patch_badge:
+            client = main.app.test_client()
+            client.get('/one_badge_image?package=google-api-core')
+
+        mock_render_cached_badge.assert_not_called()
+        self.assertEqual(
+            mock_render_badge.call_args[1]['whole_link'],
+            'http://localhost/one_badge_target?package=google-api-core')
+
+    def test__compute_check_results_shared_by_concurrent_callers(self):
+        expected_res = (
+            {'py2': {'status': main.BadgeStatus.SUCCESS, 'details': {}},
+             'py3': {'status': main.BadgeStatus.SUCCESS, 'details': {}}},
+            {'py2': {'status': main.BadgeStatus.SUCCESS, 'details': {}},
+             'py3': {'status': main.BadgeStatus.SUCCESS, 'details': {}}},
+            {'status': main.BadgeStatus.SUCCESS, 'details': {}},
+        )
+        computing = threading.Event()
+        second_caller_waiting = threading.Event()
+
+        def get_check_results(package_name):
+            computing.set()
+            second_caller_waiting.wait()
+            return expected_res
+
+        class ObservedLock(object):
+            """Signals once the lock has been acquired by both callers."""
+
+            def __init__(self):
+                self._lock = threading.Lock()
+                self._acquisitions = 0
+
+            def __enter__(self):
+                self._lock.acquire()
+                self._acquisitions += 1
+
+            def __exit__(self, *args):
+                if self._acquisitions == 2:
+                    second_caller_waiting.set()
+                self._lock.release()
+
+        mock_get_check_results = mock.Mock(side_effect=get_check_results)
+        results = []
+
+        def compute():
+            results.append(main._compute_check_results('opencensus'))
+
+        patch_check_results = mock.patch(
+            'main._get_check_results', mock_get_check_results)
+        patch_lock = mock.patch(
+            'main._pending_check_results_lock', ObservedLock())
+        patch_cache = mock.patch(
+            'main.badge_utils.cache', fake_cache.FakeCache())
+        patch_local_cache = mock.patch('main._local_check_results', {})
+        patch_executor = mock.patch('main._CACHE_WRITE_EXECUTOR')
+
+        with patch_check_results, patch_lock, patch_cache, patch_local_cache, \
+                patch_executor:
+            first = threading.Thread(target=compute)
+            first.start()
+            computing.wait()
+            second = threading.Thread(target=compute)
+            second.start()
+            first.join()
+            second.join()
+
+        self.assertEqual(mock_get_check_results.call_count, 1)
+        self.assertEqual(results, [expected_res, expected_res])
+        self.assertEqual(main._pending_check_results, {})
+
+    def test__calculate_commit_number(self):
+        mock_session = mock.Mock()
+        mock_session.get.return_value.json.return_value = [
+            {'sha': '1234abcd'}]
+
+        with mock.patch('main.badge_utils._github_session', mock_session):
+            commit_number = main.badge_utils._calculate_commit_number(
+                'git+git://github.com/google/api-core.git')
+
+        self.assertEqual(commit_number, '1234abcd')
+        mock_session.get.assert_called_once_with(
+            'https://api.github.com/repos/google/api-core/commits',
+            timeout=main.badge_utils.GITHUB_API_TIMEOUT)
+
+    def test__calculate_commit_number_error(self):
+        mock_session = mock.Mock()
+        mock_session.get.side_effect = ConnectionError('GitHub unavailable')
+
+        with mock.patch('main.badge_utils._github_session', mock_session):
+            commit_number = main.badge_utils._calculate_commit_number(
+                'git+git://github.com/google/api-core.git')
+
+        self.assertIsNone(commit_number)
@@ -24,6 +24,7 @@ from compatibility_lib import deprecated_dep_finder_stub
 from compatibility_lib import fake_compatibility_store
 from compatibility_lib import package
 
+import fake_cache
 import main
 import utils
 
@@ -579,6 +580,13 @@ UP_TO_DATE_DEPS = {
 }
 
 
+class FakeExecutor(object):
+    """Runs the submitted functions immediately."""
+
+    def submit(self, fn, *args, **kwargs):
+        fn(*args, **kwargs)
+
+
 class BadgeTestCase(unittest.TestCase):
     """Base class for tests of badge images."""
 
@@ -593,6 +601,12 @@ class BadgeTestCase(unittest.TestCase):
         self.client = main.app.test_client()
 
         self._store_patch = unittest.mock.patch('utils.store', self.fake_store)
+        self._cache_patch = unittest.mock.patch(
+            'utils.cache', fake_cache.FakeCache())
+        self._local_cache_patch = unittest.mock.patch(
+            'main._local_check_results', {})
+        self._cache_write_executor_patch = unittest.mock.patch(
+            'main._CACHE_WRITE_EXECUTOR', FakeExecutor())
         self._highlighter_patch = unittest.mock.patch(
             'utils.highlighter', self.dependency_highlighter_stub)
         self._finder_patch = unittest.mock.patch(
@@ -615,6 +629,12 @@ class BadgeTestCase(unittest.TestCase):
             })
         self._store_patch.start()
         self.addCleanup(self._store_patch.stop)
+        self._cache_patch.start()
+        self.addCleanup(self._cache_patch.stop)
+        self._local_cache_patch.start()
+        self.addCleanup(self._local_cache_patch.stop)
+        self._cache_write_executor_patch.start()
+        self.addCleanup(self._cache_write_executor_patch.stop)
         self._highlighter_patch.start()
         self.addCleanup(self._highlighter_patch.stop)
         self._finder_patch.start()
@@ -867,6 +887,19 @@ class TestUnknownPackage(BadgeTestCase):
         self.assertImageResponseGithub(package_name)
         self.assertTargetResponse(package_name)
 
+    def test_github_unknown_package_commit_number_not_calculated(self):
+        package_name = 'https://github.com/brianquinlan/notebooks'
+        with unittest.mock.patch(
+                'utils._calculate_commit_number') as mock_commit_number:
+            json_response = self.get_target_json(package_name)
+        mock_commit_number.assert_not_called()
+        self.assertIsNone(json_response['commit_number'])
+
+    def test_missing_package(self):
+        for endpoint in ('/one_badge_image', '/one_badge_target'):
+            response = self.client.get(endpoint)
+            self.assertEqual(response.status_code, 400)
+
 
 class TestMissingData(BadgeTestCase):
     """Tests for the cases where the badge image displays 'missing data.'"""
@@ -1706,3 +1739,222 @@ class TestObsoleteDependency(BadgeTestCase):
         self.assertImageResponseGithub(package_name)
         self.assertTargetResponse(
             package_name, self.expired_default_grace_period_expected_details)
+
+
+class TestConditionalRequest(BadgeTestCase):
+    """Tests for revalidating a previously fetched badge image."""
+
+    def test_unchanged_badge_not_modified(self):
+        self.fake_store.save_compatibility_statuses(RECENT_SUCCESS_DATA)
+        response = self.client.get(
+            '/one_badge_image', query_string={'package': 'google-api-core'})
+        self.assertEqual(response.status_code, 200)
+        etag, _ = response.get_etag()
+        self.assertIsNotNone(etag)
+
+        response = self.client.get(
+            '/one_badge_image',
+            query_string={'package': 'google-api-core'},
+            headers={'If-None-Match': '"{}"'.format(etag)})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b'')
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+
+    def test_changed_badge_modified(self):
+        self.fake_store.save_compatibility_statuses(RECENT_SUCCESS_DATA)
+        response = self.client.get(
+            '/one_badge_image',
+            query_string={'package': 'google-api-core'},
+            headers={'If-None-Match': '"stale-etag"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['right_text'],
+                         main.BadgeStatus.SUCCESS.value)
+
+
+class TestCachedResults(BadgeTestCase):
+    """Tests for serving check results from the cache."""
+
+    def test_results_served_from_cache(self):
+        package_name = 'google-api-core'
+        self._assertImageResponsePyPI(
+            package_name, main.BadgeStatus.MISSING_DATA)
+
+        self.fake_store.save_compatibility_statuses(RECENT_SUCCESS_DATA)
+        self._assertImageResponsePyPI(
+            package_name, main.BadgeStatus.MISSING_DATA)
+
+    def test_results_served_from_local_cache(self):
+        package_name = 'google-api-core'
+        self._assertImageResponsePyPI(
+            package_name, main.BadgeStatus.MISSING_DATA)
+
+        with unittest.mock.patch.object(
+                utils.cache, 'get', wraps=utils.cache.get) as mock_get:
+            self._assertImageResponsePyPI(
+                package_name, main.BadgeStatus.MISSING_DATA)
+            mock_get.assert_not_called()
+
+            with unittest.mock.patch('main.LOCAL_CACHE_MAX_AGE',
+                                     datetime.timedelta(0)):
+                self._assertImageResponsePyPI(
+                    package_name, main.BadgeStatus.MISSING_DATA)
+            mock_get.assert_called_once()
+
+    def test_stale_results_recomputed(self):
+        package_name = 'google-api-core'
+        self._assertImageResponsePyPI(
+            package_name, main.BadgeStatus.MISSING_DATA)
+
+        self.fake_store.save_compatibility_statuses(RECENT_SUCCESS_DATA)
+        with unittest.mock.patch('main.CACHE_MAX_AGE',
+                                 datetime.timedelta(0)):
+            self._assertImageResponsePyPI(
+                package_name, main.BadgeStatus.SUCCESS)
+
+    def test_refresh_cached_check_results(self):
+        package_name = 'google-api-core'
+        self._assertImageResponsePyPI(
+            package_name, main.BadgeStatus.MISSING_DATA)
+
+        self.fake_store.save_compatibility_statuses(RECENT_SUCCESS_DATA)
+        with unittest.mock.patch('main.CACHE_REFRESH_INTERVAL',
+                                 datetime.timedelta(0)):
+            main._refresh_cached_check_results()
+        self._assertImageResponsePyPI(package_name, main.BadgeStatus.SUCCESS)
+
+    def test_refresh_skips_recently_refreshed_results(self):
+        package_name = 'google-api-core'
+        self._assertImageResponsePyPI(
+            package_name, main.BadgeStatus.MISSING_DATA)
+
+        self.fake_store.save_compatibility_statuses(RECENT_SUCCESS_DATA)
+        main._refresh_cached_check_results()
+        self._assertImageResponsePyPI(
+            package_name, main.BadgeStatus.MISSING_DATA)
+
+    def test_refresh_skips_results_refreshed_during_pass(self):
+        package_name = 'google-api-core'
+        results = main._get_check_results(package_name)
+        computed = []
+
+        def compute_check_results(name):
+            computed.append(name)
+            if len(computed) == 1:
+                # Another process refreshes the results while the first
+                # package of the pass is being computed.
+                utils.cache.set(
+                    main._get_cache_key(package_name),
+                    {'timestamp': datetime.datetime.now().timestamp(),
+                     'results': list(results)})
+
+        patch_compute = unittest.mock.patch(
+            'main._compute_check_results', side_effect=compute_check_results)
+        patch_shuffle = unittest.mock.patch('main.random.shuffle')
+        with patch_compute, patch_shuffle:
+            main._refresh_cached_check_results()
+
+        self.assertEqual(computed[0], 'apache-beam[gcp]')
+        self.assertNotIn(package_name, computed)
+
+    def test_refresh_skips_results_claimed_by_another_process(self):
+        package_name = 'google-api-core'
+        self.assertTrue(utils.cache.add(
+            main._get_refresh_claim_key(package_name), True, 60))
+        computed = []
+
+        with unittest.mock.patch('main._compute_check_results',
+                                 side_effect=computed.append):
+            main._refresh_cached_check_results()
+
+        self.assertIn('apache-beam[gcp]', computed)
+        self.assertNotIn(package_name, computed)
+
+        # The claims made by the pass keep other processes from refreshing
+        # the same packages.
+        computed.clear()
+        with unittest.mock.patch('main._compute_check_results',
+                                 side_effect=computed.append):
+            main._refresh_cached_check_results()
+        self.assertEqual(computed, [])
+
+    def test_internal_error_results_expire_sooner(self):
+        package_name = 'google-api-core'
+        with unittest.mock.patch.object(
+                self.fake_store, 'get_self_compatibility',
+                side_effect=Exception('store unavailable')):
+            self._assertImageResponsePyPI(
+                package_name, main.BadgeStatus.INTERNAL_ERROR)
+
+        self.fake_store.save_compatibility_statuses(RECENT_SUCCESS_DATA)
+        self._assertImageResponsePyPI(
+            package_name, main.BadgeStatus.INTERNAL_ERROR)
+        with unittest.mock.patch('main.ERROR_CACHE_MAX_AGE',
+                                 datetime.timedelta(0)):
+            self._assertImageResponsePyPI(
+                package_name, main.BadgeStatus.SUCCESS)
+            self._assertImageResponsePyPI(
+                package_name, main.BadgeStatus.SUCCESS)
+
+    def test_cache_errors_ignored(self):
+        mock_cache = unittest.mock.Mock()
+        mock_cache.get.side_effect = ConnectionError('cache unavailable')
+        mock_cache.set.side_effect = ConnectionError('cache unavailable')
+        self.fake_store.save_compatibility_statuses(RECENT_SUCCESS_DATA)
+
+        with unittest.mock.patch('utils.cache', mock_cache):
+            self._assertImageResponsePyPI(
+                'google-api-core', main.BadgeStatus.SUCCESS)
+        mock_cache.set.assert_called_once()
+
+    def test_local_results_used_when_cache_unavailable(self):
+        package_name = 'google-api-core'
+        self._assertImageResponsePyPI(
+            package_name, main.BadgeStatus.MISSING_DATA)
+
+        self.fake_store.save_compatibility_statuses(RECENT_SUCCESS_DATA)
+        mock_cache = unittest.mock.Mock()
+        mock_cache.get.side_effect = ConnectionError('cache unavailable')
+        patch_local_max_age = unittest.mock.patch(
+            'main.LOCAL_CACHE_MAX_AGE', datetime.timedelta(0))
+        with patch_local_max_age:
+            with unittest.mock.patch('utils.cache', mock_cache):
+                self._assertImageResponsePyPI(
+                    package_name, main.BadgeStatus.MISSING_DATA)
+            # The results are also missing if their write failed.
+            with unittest.mock.patch('utils.cache', fake_cache.FakeCache()):
+                self._assertImageResponsePyPI(
+                    package_name, main.BadgeStatus.MISSING_DATA)
+            with unittest.mock.patch('main.CACHE_MAX_AGE',
+                                     datetime.timedelta(0)):
+                self._assertImageResponsePyPI(
+                    package_name, main.BadgeStatus.SUCCESS)
+
+    def test_cache_written_in_background(self):
+        self.fake_store.save_compatibility_statuses(RECENT_SUCCESS_DATA)
+        mock_executor = unittest.mock.Mock()
+
+        with unittest.mock.patch('main._CACHE_WRITE_EXECUTOR', mock_executor):
+            self._assertImageResponsePyPI(
+                'google-api-core', main.BadgeStatus.SUCCESS)
+        self.assertIsNone(utils.cache.get(
+            main._get_cache_key('google-api-core')))
+
+        fn, *args = mock_executor.submit.call_args[0]
+        fn(*args)
+        self.assertIsNotNone(utils.cache.get(
+            main._get_cache_key('google-api-core')))
+
+    def test_refresh_cache_errors_ignored(self):
+        package_name = 'google-api-core'
+        self._assertImageResponsePyPI(
+            package_name, main.BadgeStatus.MISSING_DATA)
+
+        self.fake_store.save_compatibility_statuses(RECENT_SUCCESS_DATA)
+        patch_get_multi = unittest.mock.patch.object(
+            utils.cache, 'get_multi',
+            side_effect=ConnectionError('cache unavailable'))
+        patch_interval = unittest.mock.patch('main.CACHE_REFRESH_INTERVAL',
+                                             datetime.timedelta(0))
+        with patch_get_multi, patch_interval:
+            main._refresh_cached_check_results()
+        self._assertImageResponsePyPI(package_name, main.BadgeStatus.SUCCESS)
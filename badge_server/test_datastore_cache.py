@@ -0,0 +1,95 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import mock
+import time
+import unittest
+
+import datastore_cache
+
+
+def _make_key(kind, name):
+    # `name` is a reserved argument of the Mock constructor.
+    key = mock.Mock(kind=kind)
+    key.name = name
+    return key
+
+
+def _make_entity(name, value):
+    entity = mock.MagicMock()
+    entity.key = _make_key('_Cache', name)
+    entity.__getitem__.side_effect = {'value': json.dumps(value)}.__getitem__
+    return entity
+
+
+class _Entity(dict):
+
+    def __init__(self, key, exclude_from_indexes=()):
+        super().__init__()
+        self.key = key
+
+
+class TestDatastoreCache(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_client = mock.Mock()
+        self.mock_client.key.side_effect = _make_key
+        self.mock_client.transaction.return_value = mock.MagicMock()
+        patch_client = mock.patch(
+            'datastore_cache.datastore.Client', return_value=self.mock_client)
+        with patch_client:
+            self.cache = datastore_cache.DatastoreCache()
+
+    def test_get_multi(self):
+        # Datastore doesn't return the entities in the order of the keys.
+        self.mock_client.get_multi.return_value = [
+            _make_entity('a', {'status': 'SUCCESS'}),
+            _make_entity('b', [1, 2]),
+        ]
+
+        values = self.cache.get_multi(['b', 'missing', 'a'])
+
+        self.assertEqual(values, [[1, 2], None, {'status': 'SUCCESS'}])
+        self.mock_client.get_multi.assert_called_once()
+        keys = self.mock_client.get_multi.call_args[0][0]
+        self.assertEqual([(key.kind, key.name) for key in keys],
+                         [('_Cache', 'b'), ('_Cache', 'missing'),
+                          ('_Cache', 'a')])
+
+    def test_add(self):
+        self.mock_client.get.return_value = None
+
+        with mock.patch('datastore_cache.datastore.Entity', _Entity):
+            self.assertTrue(self.cache.add('a', True, 60))
+
+        self.mock_client.transaction.assert_called_once()
+        entity = self.mock_client.put.call_args[0][0]
+        self.assertEqual(json.loads(entity['value']), True)
+        self.assertGreater(entity['expires'], time.time())
+
+    def test_add_already_set(self):
+        self.mock_client.get.return_value = {
+            'value': 'true', 'expires': time.time() + 60}
+
+        self.assertFalse(self.cache.add('a', False, 60))
+        self.mock_client.put.assert_not_called()
+
+    def test_add_expired(self):
+        self.mock_client.get.return_value = {
+            'value': 'true', 'expires': time.time() - 1}
+
+        with mock.patch('datastore_cache.datastore.Entity', _Entity):
+            self.assertTrue(self.cache.add('a', False, 60))
+        self.mock_client.put.assert_called_once()
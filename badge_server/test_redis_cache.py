@@ -0,0 +1,60 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+import unittest
+
+import redis_cache
+
+
+class TestRedisCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = redis_cache.RedisCache()
+        self.values = {}
+        self.mock_client = mock.Mock()
+        self.mock_client.set.side_effect = self._set
+        self.mock_client.get.side_effect = self.values.get
+        self.mock_client.mget.side_effect = (
+            lambda names: [self.values.get(name) for name in names])
+        self.cache._redis_client = self.mock_client
+
+    def _set(self, name, value, nx=False, ex=None):
+        if nx and name in self.values:
+            return None
+        self.values[name] = value
+        return True
+
+    def test_get_set(self):
+        self.cache.set('a', {'status': 'SUCCESS'})
+
+        self.assertEqual(self.cache.get('a'), {'status': 'SUCCESS'})
+        self.assertIsNone(self.cache.get('missing'))
+
+    def test_get_multi(self):
+        self.cache.set('a', {'status': 'SUCCESS'})
+        self.cache.set('b', [1, 2])
+
+        values = self.cache.get_multi(['b', 'missing', 'a'])
+
+        self.assertEqual(values, [[1, 2], None, {'status': 'SUCCESS'}])
+        self.mock_client.mget.assert_called_once_with(['b', 'missing', 'a'])
+
+    def test_add(self):
+        self.assertTrue(self.cache.add('a', True, 60))
+        self.assertFalse(self.cache.add('a', False, 60))
+
+        self.assertEqual(self.cache.get('a'), True)
+        self.mock_client.set.assert_called_with(
+            'a', mock.ANY, nx=True, ex=60)
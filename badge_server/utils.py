@@ -15,21 +15,21 @@
 """Common utils methods for badge server."""
 
 import enum
-import json
 import logging
+import os
 from urllib.parse import urlparse
-from urllib.request import urlopen
 
 from typing import Optional
 
-import pybadges
+import requests
 
 from compatibility_lib import compatibility_checker
 from compatibility_lib import compatibility_store
-from compatibility_lib import configs
 from compatibility_lib import dependency_highlighter
 from compatibility_lib import deprecated_dep_finder
 
+import fake_cache
+
 # Initializations
 DB_CONNECTION_NAME = 'python-compatibility-tools:us-central1:' \
                      'compatibility-data'
@@ -43,10 +43,20 @@ finder = deprecated_dep_finder.DeprecatedDepFinder(
     checker=checker, store=store)
 priority_level = dependency_highlighter.PriorityLevel
 
-TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+if os.environ.get('RUN_LOCALLY') is not None:
+    cache = fake_cache.FakeCache()
+else:
+    import redis_cache
+    cache = redis_cache.RedisCache()
 
-GITHUB_HEAD_NAME = 'github head'
 GITHUB_API = 'https://api.github.com/repos'
+GITHUB_API_TIMEOUT = 10
+
+# The GitHub API is queried for the head commit of whitelisted GitHub packages
+# on every badge target request, so connections to it are kept alive and
+# reused.
+_github_session = requests.Session()
+
 SVG_CONTENT_TYPE = 'image/svg+xml'
 EMPTY_DETAILS = 'NO DETAILS'
 
@@ -55,18 +65,6 @@ PY_VER_MAPPING = {
     3: 'py3',
 }
 
-STATUS_COLOR_MAPPING = {
-    'SUCCESS': 'green',
-    'UNKNOWN': 'purple',
-    'INSTALL_ERROR': 'yellow',
-    'CHECK_WARNING': 'red',
-    'CALCULATING': 'blue',
-    'CONVERSION_ERROR': 'orange',
-    'UP_TO_DATE': 'green',
-    'LOW_PRIORITY': 'yellow',
-    'HIGH_PRIORITY': 'red',
-}
-
 
 class BadgeType(enum.Enum):
     """Enum class for badge types."""
@@ -101,32 +99,6 @@ def _build_default_result(
     return result
 
 
-def _get_badge(res: dict, badge_name: str) -> str:
-    """Generate badge using the check result."""
-    if 'github.com' in badge_name:
-        badge_name = GITHUB_HEAD_NAME
-
-    status = res.get('status')
-    if status is not None:
-        # Dependency badge
-        color = STATUS_COLOR_MAPPING[status]
-    else:
-        # Compatibility badge
-        status = res['py3']['status']
-        if status == 'SUCCESS' and \
-            badge_name not in \
-                configs.PKG_PY_VERSION_NOT_SUPPORTED.get(2):
-            status = res['py2']['status']
-
-        color = STATUS_COLOR_MAPPING[status]
-
-    status = status.replace('_', ' ')
-    return pybadges.badge(
-        left_text=badge_name,
-        right_text=status,
-        right_color=color)
-
-
 def _calculate_commit_number(package: str) -> Optional[str]:
     """Calculate the github head version commit number."""
     url_parsed = urlparse(package)
@@ -139,9 +111,9 @@ def _calculate_commit_number(package: str) -> Optional[str]:
         else:
             url = '{0}/{1}/{2}/commits'.format(GITHUB_API, owner, repo)
             try:
-                with urlopen(url) as f:
-                    commits = json.loads(f.read())
-                return commits[0]['sha']
+                response = _github_session.get(url, timeout=GITHUB_API_TIMEOUT)
+                response.raise_for_status()
+                return response.json()[0]['sha']
             except Exception as e:
                 logging.warning(
                     'Unable to generate caching key for "%s": %s', package, e)
@@ -19,6 +19,7 @@ import logging
 import concurrent.futures
 import json
 import requests
+from requests import adapters
 import retrying
 import time
 
@@ -36,6 +37,11 @@ class CompatibilityChecker(object):
 
     def __init__(self, max_workers=20):
         self.max_workers = max_workers
+        # Reuse connections to the checker server across checks. The pool
+        # holds a connection for each of the get_compatibility() workers.
+        self._session = requests.Session()
+        self._session.mount('http://', adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=max_workers))
 
     def check(self, packages, python_version):
         """Call the checker server to get back status results."""
@@ -54,7 +60,8 @@ class CompatibilityChecker(object):
         # Set the timeout to 299 seconds, which should be less than the
         # docker timeout (300 seconds).
         try:
-            result = requests.get(SERVER_URL, params=data, timeout=299)
+            result = self._session.get(
+                SERVER_URL, params=data, timeout=299)
             content = result.content.decode('utf-8')
         except Exception as e:
             check_time = time.time() - start_time
@@ -65,12 +72,11 @@ class CompatibilityChecker(object):
         check_time = time.time() - start_time
         if result.ok:
             logging.getLogger("compatibility_lib").debug(
-                'Checked {} in {:.1f} seconds (success!)'.format(
-                    packages, check_time))
+                'Checked %s in %.1f seconds (success!)', packages, check_time)
         else:
             logging.getLogger("compatibility_lib").debug(
-                'Checked {} in {:.1f} seconds: {}'.format(
-                    packages, check_time, content))
+                'Checked %s in %.1f seconds: %s',
+                packages, check_time, content)
             result.raise_for_status()
 
         return json.loads(content), python_version
@@ -137,7 +143,7 @@ class CompatibilityChecker(object):
                     continue
                 filtered_pkgs.append(pkgs)
             check_pairs = [(list(pkg_set), python_version)
-                           for pkg_set in pkg_sets]
+                           for pkg_set in filtered_pkgs]
 
         res = tuple(check_singles) + tuple(check_pairs)
         return res
@@ -32,6 +32,12 @@ _SELF_COMPATIBILITY_STATUS_TABLE_NAME = 'self_compatibility_status'
 _PAIRWISE_COMPATIBILITY_STATUS_TABLE_NAME = 'pairwise_compatibility_status'
 _RELEASE_TIME_FOR_DEPENDENCIES_TABLE_NAME = 'release_time_for_dependencies'
 
+# Bounds how long connecting to the database and reading a query's results
+# may take, in seconds, so that a hung query fails instead of holding on to
+# the calling thread indefinitely.
+MYSQL_CONNECT_TIMEOUT = 10
+MYSQL_READ_TIMEOUT = 30
+
 
 class Status(enum.Enum):
     UNKNOWN = "UNKNOWN"
@@ -289,7 +295,9 @@ class CompatibilityStore:
                 user=self.mysql_user,
                 password=self.mysql_password,
                 db=self.mysql_db,
-                charset='utf8mb4')
+                charset='utf8mb4',
+                connect_timeout=MYSQL_CONNECT_TIMEOUT,
+                read_timeout=MYSQL_READ_TIMEOUT)
         else:
             conn = pymysql.connect(
                 host=self.mysql_host,
@@ -297,7 +305,9 @@ class CompatibilityStore:
                 user=self.mysql_user,
                 password=self.mysql_password,
                 db=self.mysql_db,
-                charset='utf8mb4')
+                charset='utf8mb4',
+                connect_timeout=MYSQL_CONNECT_TIMEOUT,
+                read_timeout=MYSQL_READ_TIMEOUT)
         return conn
 
     @staticmethod
@@ -511,9 +521,11 @@ class CompatibilityStore:
                frozenset([p1, p4]): [CompatibilityResult...],
             }.
         """
-        pkg_sets = [sorted([package_name, pkg]) for pkg in configs.PKG_LIST]
-        install_names_lower = [pair[0] for pair in pkg_sets]
-        install_names_higher = [pair[1] for pair in pkg_sets]
+        install_names_lower = []
+        install_names_higher = []
+        for pkg in configs.PKG_LIST:
+            install_names_lower.append(min(package_name, pkg))
+            install_names_higher.append(max(package_name, pkg))
         packages_to_results = {}
 
         query = ('SELECT * '
@@ -532,16 +544,22 @@ class CompatibilityStore:
                             package_name, package_name))
                 results = cursor.fetchall()
 
+        # Each pair has a row per python version, so the packages and the
+        # mapping key are only built for the first row of a pair.
+        pairs = {}
         for row in results:
             install_name_lower, install_name_higher, _, _, _, _ = row
-            p_lower = package.Package(install_name_lower)
-            p_higher = package.Package(install_name_higher)
-            key = frozenset([p_lower, p_higher])
-            if not packages_to_results.get(key):
-                packages_to_results[key] = []
-            packages_to_results[key].append(
-                self._row_to_compatibility_status([p_lower, p_higher], row)
-            )
+            pair = pairs.get((install_name_lower, install_name_higher))
+            if pair is None:
+                p_lower = package.Package(install_name_lower)
+                p_higher = package.Package(install_name_higher)
+                key = frozenset([p_lower, p_higher])
+                pair = ([p_lower, p_higher], packages_to_results.setdefault(
+                    key, []))
+                pairs[(install_name_lower, install_name_higher)] = pair
+            packages, pair_results = pair
+            pair_results.append(
+                self._row_to_compatibility_status(packages, row))
         return packages_to_results
 
     def save_compatibility_statuses(
@@ -655,20 +673,47 @@ class CompatibilityStore:
                    'latest_version_time': datetime.datetime(...)},
             }
         """
+        return self.get_dependency_infos([package_name])[package_name]
+
+    def get_dependency_infos(self, package_names: Iterable[str]) -> \
+            Mapping[str, Mapping[str, Mapping[str, Any]]]:
+        """Returns dependency info for several Google OSS packages.
+
+        The dependency info for all of the packages is fetched with a single
+        query.
+
+        Args:
+            package_names: The packages to lookup for.
+
+        Returns:
+            A mapping between the given package names and their dependency
+            info (see `get_dependency_info`). A package without any dependency
+            info is mapped to an empty dict.
+        """
+        package_names = list(package_names)
+        package_to_dependency_info = {name: {} for name in package_names}
+        if not package_names:
+            return package_to_dependency_info
+
+        # MySQL compares the names case-insensitively, so the rows are mapped
+        # back to the requested names the same way.
+        lower_name_to_package_names = {}
+        for name in package_names:
+            lower_name_to_package_names.setdefault(name.lower(), []).append(
+                name)
+
         query = ("SELECT * FROM release_time_for_dependencies "
-                 "WHERE install_name=%s")
+                 "WHERE install_name IN %s")
 
         with closing(self.connect()) as conn:
             with closing(conn.cursor()) as cursor:
-                cursor.execute(query, package_name)
+                cursor.execute(query, [package_names])
                 results = cursor.fetchall()
 
-        dependency_info = {}
         for row in results:
             install_name, dep_name, installed_version,\
                 installed_version_time, latest_version,\
                 latest_version_time, is_latest, timestamp = row
-            key = dep_name
             value = {
                 'installed_version': installed_version,
                 'installed_version_time': installed_version_time,
@@ -677,6 +722,8 @@ class CompatibilityStore:
                 'is_latest': is_latest,
                 'current_time': timestamp,
             }
-            dependency_info[key] = value
+            for name in lower_name_to_package_names.get(
+                    install_name.lower(), []):
+                package_to_dependency_info[name][dep_name] = value
 
-        return dependency_info
+        return package_to_dependency_info
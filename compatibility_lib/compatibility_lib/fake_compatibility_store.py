@@ -174,3 +174,7 @@ class CompatibilityStore:
 
     def get_dependency_info(self, package_name):
         return self._package_to_dependency_info.get(package_name, {})
+
+    def get_dependency_infos(self, package_names):
+        return {name: self.get_dependency_info(name)
+                for name in package_names}
@@ -33,18 +33,16 @@ class TestCompatibilityChecker(unittest.TestCase):
             'package': packages,
         }
 
-        mock_requests = mock.Mock()
+        mock_session = mock.Mock()
         mock_response = mock.Mock(content=b'{}')
-        mock_requests.get.return_value = mock_response
+        mock_session.get.return_value = mock_response
 
-        patch_request = mock.patch(
-            'compatibility_lib.compatibility_checker.requests',
-            mock_requests)
+        patch_session = mock.patch.object(checker, '_session', mock_session)
 
-        with patch_request:
+        with patch_session:
             checker.check(packages, python_version)
 
-        mock_requests.get.assert_called_with(
+        mock_session.get.assert_called_with(
             compatibility_checker.SERVER_URL, params=data, timeout=299)
         self.assertEqual(compatibility_checker.SERVER_URL,
                          expected_server_url)
@@ -100,6 +98,31 @@ class TestCompatibilityChecker(unittest.TestCase):
 
         self.assertEqual(sorted(res), expected)
 
+    def test_collect_check_packages_python_version(self):
+        checker = compatibility_checker.CompatibilityChecker()
+
+        mock_config = mock.Mock()
+        mock_config.PKG_LIST = ['pkg1', 'pkg2', 'tensorflow']
+        mock_config.PKG_PY_VERSION_NOT_SUPPORTED = {
+            2: ['tensorflow', ],
+            3: [],
+        }
+        patch_config = mock.patch(
+            'compatibility_lib.compatibility_checker.configs', mock_config)
+
+        with patch_config:
+            res = checker.collect_check_packages(python_version='2')
+            single_res = checker.collect_check_packages(
+                python_version='2', packages=['pkg1'], pkg_sets=[])
+
+        expected = (
+            (['pkg1'], '2'),
+            (['pkg2'], '2'),
+            (['pkg1', 'pkg2'], '2'),
+        )
+        self.assertEqual(res, expected)
+        self.assertEqual(single_res, ((['pkg1'], '2'),))
+
 
 class FakeExecutor(object):
     def __init__(self, max_workers=10):
@@ -156,6 +156,21 @@ class TestCompatibilityStore(unittest.TestCase):
                 isinstance(pkg, compatibility_store.package.Package))
             self.assertEqual(pkg.install_name, pkgs[i])
 
+    def test_connect_timeouts(self):
+        mock_pymysql = mock.Mock()
+        patch_pymysql = mock.patch(
+            'compatibility_lib.compatibility_store.pymysql', mock_pymysql)
+
+        with patch_pymysql:
+            store = compatibility_store.CompatibilityStore()
+            store.connect()
+
+        _, kwargs = mock_pymysql.connect.call_args
+        self.assertEqual(kwargs['connect_timeout'],
+                         compatibility_store.MYSQL_CONNECT_TIMEOUT)
+        self.assertEqual(kwargs['read_timeout'],
+                         compatibility_store.MYSQL_READ_TIMEOUT)
+
     def test_get_self_compatibility(self):
         row = (PACKAGE_1.install_name, 'SUCCESS', '3',
                '2018-07-17 01:07:08.936648 UTC', None)
@@ -203,6 +218,65 @@ class TestCompatibilityStore(unittest.TestCase):
         self.assertEqual(len(res), 4)
         self.assertEqual(frozenset(res.keys()), frozenset(packages))
 
+    def test_get_dependency_infos(self):
+        rows = [
+            (PACKAGE_1.install_name, 'six', '1.12.0', None, '1.12.0', None,
+             1, None),
+            (PACKAGE_1.install_name, 'protobuf', '3.6.0', None, '3.7.1',
+             None, 0, None),
+            (PACKAGE_2.install_name, 'six', '1.11.0', None, '1.12.0', None,
+             0, None),
+        ]
+
+        mock_pymysql = mock.Mock()
+        mock_conn = mock.Mock()
+        mock_cursor = mock.Mock()
+        mock_pymysql.connect.return_value = mock_conn
+        mock_conn.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = rows
+        patch_pymysql = mock.patch(
+            'compatibility_lib.compatibility_store.pymysql',
+            mock_pymysql)
+        store = compatibility_store.CompatibilityStore()
+        package_names = [PACKAGE_1.install_name, PACKAGE_2.install_name,
+                         PACKAGE_3.install_name]
+
+        with patch_pymysql:
+            res = store.get_dependency_infos(package_names)
+
+        self.assertEqual(mock_cursor.execute.call_count, 1)
+        self.assertEqual(frozenset(res.keys()), frozenset(package_names))
+        self.assertEqual(
+            sorted(res[PACKAGE_1.install_name].keys()), ['protobuf', 'six'])
+        self.assertEqual(
+            res[PACKAGE_2.install_name]['six']['installed_version'], '1.11.0')
+        self.assertEqual(res[PACKAGE_3.install_name], {})
+
+    def test_get_dependency_infos_differently_cased_rows(self):
+        # MySQL matches the names case-insensitively.
+        rows = [
+            ('Google-API-Core', 'six', '1.12.0', None, '1.12.0', None, 1,
+             None),
+        ]
+
+        mock_pymysql = mock.Mock()
+        mock_conn = mock.Mock()
+        mock_cursor = mock.Mock()
+        mock_pymysql.connect.return_value = mock_conn
+        mock_conn.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = rows
+        patch_pymysql = mock.patch(
+            'compatibility_lib.compatibility_store.pymysql',
+            mock_pymysql)
+        store = compatibility_store.CompatibilityStore()
+
+        with patch_pymysql:
+            res = store.get_dependency_infos(['google-api-core'])
+
+        self.assertEqual(list(res.keys()), ['google-api-core'])
+        self.assertEqual(
+            res['google-api-core']['six']['installed_version'], '1.12.0')
+
     def test_get_pair_compatibility_value_error(self):
         # get_pair_compatibility needs 2 packages to run the check, or it will
         # raise ValueError.
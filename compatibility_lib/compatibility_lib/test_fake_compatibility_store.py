@@ -284,3 +284,10 @@ class TestCompatibilityStore(unittest.TestCase):
         self.assertEqual(
             self._store.get_dependency_info('package1'),
             RECENT_DEPS_1)
+
+    def test_get_dependency_infos(self):
+        self._store.save_compatibility_statuses(
+            [PACKAGE_1_PY3_CR_WITH_RECENT_DEPS])
+        self.assertEqual(
+            self._store.get_dependency_infos(['package1', 'package2']),
+            {'package1': RECENT_DEPS_1, 'package2': {}})
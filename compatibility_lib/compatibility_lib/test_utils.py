@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import mock
+import requests
 import unittest
 
 from compatibility_lib import fake_compatibility_store
@@ -57,7 +58,8 @@ class MockChecker(object):
             'dependency_info': DEP_INFO,
         }
 
-    def get_compatibility(self, python_version, packages=None):
+    def get_compatibility(self, python_version, packages=None, pkg_sets=None):
+        assert pkg_sets == [], 'Only single package checks are expected'
         return [[self.check(
             packages=packages, python_version=python_version)]]
 
@@ -127,3 +129,66 @@ class Test__parse_datetime(unittest.TestCase):
   def test__parse_datetime_empty(self):
       res = utils._parse_datetime(None)
       self.assertIsNone(res)
+
+
+class Test__is_package_in_whitelist(unittest.TestCase):
+
+    def test__is_package_in_whitelist(self):
+        self.assertTrue(utils._is_package_in_whitelist(
+            ['google-api-core', 'google-cloud-asset']))
+        self.assertFalse(utils._is_package_in_whitelist(
+            ['google-api-core', 'not-whitelisted']))
+
+    def test__is_package_in_whitelist_pkg_list_replaced(self):
+        self.assertTrue(utils._is_package_in_whitelist(['google-api-core']))
+
+        with mock.patch('compatibility_lib.configs.PKG_LIST', ['opencensus']):
+            self.assertFalse(
+                utils._is_package_in_whitelist(['google-api-core']))
+            self.assertTrue(utils._is_package_in_whitelist(['opencensus']))
+
+        self.assertTrue(utils._is_package_in_whitelist(['google-api-core']))
+
+    def test__is_package_in_whitelist_pkg_list_mutated(self):
+        pkg_list = ['google-api-core']
+
+        with mock.patch('compatibility_lib.configs.PKG_LIST', pkg_list):
+            self.assertFalse(utils._is_package_in_whitelist(['opencensus']))
+            pkg_list.append('opencensus')
+            self.assertTrue(utils._is_package_in_whitelist(['opencensus']))
+
+
+class Test_call_pypi_json_api(unittest.TestCase):
+
+    def test_call_pypi_json_api(self):
+        mock_session = mock.Mock()
+        mock_session.get.return_value = mock.Mock(
+            ok=True, json=mock.Mock(return_value={'info': {}}))
+
+        with mock.patch('compatibility_lib.utils._pypi_session', mock_session):
+            res = utils.call_pypi_json_api('opencensus', '0.1.0')
+
+        mock_session.get.assert_called_with(
+            'https://pypi.org/pypi/opencensus/0.1.0/json',
+            timeout=utils.PYPI_TIMEOUT)
+        self.assertEqual(res, {'info': {}})
+
+    def test_call_pypi_json_api_not_found(self):
+        mock_session = mock.Mock()
+        mock_session.get.return_value = mock.Mock(ok=False)
+
+        with mock.patch('compatibility_lib.utils._pypi_session', mock_session):
+            res = utils.call_pypi_json_api('pkg_not_in_pypi')
+
+        mock_session.get.assert_called_with(
+            'https://pypi.org/pypi/pkg_not_in_pypi/json',
+            timeout=utils.PYPI_TIMEOUT)
+        self.assertIsNone(res)
+
+    def test_call_pypi_json_api_timeout(self):
+        mock_session = mock.Mock()
+        mock_session.get.side_effect = requests.exceptions.Timeout()
+
+        with mock.patch('compatibility_lib.utils._pypi_session', mock_session):
+            with self.assertRaises(requests.exceptions.Timeout):
+                utils.call_pypi_json_api('opencensus')
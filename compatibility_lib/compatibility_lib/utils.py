@@ -15,9 +15,10 @@
 """Common utils for compatibility_lib."""
 
 from datetime import datetime
-import json
 import logging
-import urllib.request
+
+import requests
+from requests import adapters
 
 from compatibility_lib import compatibility_checker
 from compatibility_lib import configs
@@ -25,6 +26,16 @@ from compatibility_lib import configs
 DATETIME_FORMAT = "%Y-%m-%d"
 
 PYPI_URL = 'https://pypi.org/pypi/'
+PYPI_TIMEOUT = 10
+
+# The PyPI JSON API is called for every dependency of every package, often
+# from a thread pool, so connections to PyPI are kept open and reused.
+_pypi_session = requests.Session()
+_pypi_session.mount(PYPI_URL, adapters.HTTPAdapter(pool_maxsize=50))
+
+# configs.PKG_LIST as a frozenset so that whitelist checks don't scan the list.
+# It is rebuilt whenever the length of configs.PKG_LIST changes.
+_pkg_list_set = frozenset(configs.PKG_LIST)
 
 
 class PackageNotSupportedError(Exception):
@@ -44,16 +55,20 @@ def call_pypi_json_api(package_name, pkg_version=None):
     else:
         pypi_pkg_url = PYPI_URL + '{}/json'.format(package_name)
 
-    try:
-        r = urllib.request.Request(pypi_pkg_url)
-
-        with urllib.request.urlopen(r) as f:
-            result = json.loads(f.read().decode('utf-8'))
-    except urllib.error.HTTPError:
+    response = _pypi_session.get(pypi_pkg_url, timeout=PYPI_TIMEOUT)
+    if not response.ok:
         logging.error('Package {} with version {} not found in Pypi'.
                       format(package_name, pkg_version))
         return None
-    return result
+    return response.json()
+
+
+def _get_pkg_list_set():
+    """Return configs.PKG_LIST as a frozenset."""
+    global _pkg_list_set
+    if len(_pkg_list_set) != len(configs.PKG_LIST):
+        _pkg_list_set = frozenset(configs.PKG_LIST)
+    return _pkg_list_set
 
 
 def _is_package_in_whitelist(packages):
@@ -65,8 +80,9 @@ def _is_package_in_whitelist(packages):
     Returns:
         True if all packages are in whitelist, else False.
     """
+    pkg_set = _get_pkg_list_set()
     for pkg in packages:
-        if pkg not in configs.PKG_LIST and pkg not in configs.WHITELIST_URLS:
+        if pkg not in pkg_set and pkg not in configs.WHITELIST_URLS:
             return False
 
     return True
@@ -114,8 +130,11 @@ class DependencyInfo(object):
             a dict mapping from dependency package name (string) to
             the info (dict)
         """
+        # Pass no package pairs, otherwise every pair of packages in
+        # configs.PKG_LIST would be checked to get the info of one package.
         _result = self.checker.get_compatibility(
-            python_version=self.py_version, packages=[package_name])
+            python_version=self.py_version, packages=[package_name],
+            pkg_sets=[])
         result = [item for item in _result]
         depinfo = result[0][0].get('dependency_info')
 
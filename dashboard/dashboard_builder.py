@@ -384,10 +384,9 @@ def main():
         logging.info('Getting pairwise compatibility results...')
         pairwise_to_results = store.get_compatibility_combinations(packages)
 
-        package_with_dependency_info = {}
-        for pkg in configs.PKG_LIST:
-            dep_info = store.get_dependency_info(pkg)
-            package_with_dependency_info[pkg] = dep_info
+        logging.info('Getting dependency info...')
+        package_with_dependency_info = store.get_dependency_infos(
+            configs.PKG_LIST)
 
         results = _ResultHolder(
             package_to_results,